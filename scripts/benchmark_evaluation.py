@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Scalability benchmark for the trajectory evaluator.
+Times each evaluation stage and records its memory (RSS growth measured in
+a fresh child process, plus Python heap peak) across synthetic trajectory
+sizes, optionally comparing against a stored baseline.
+Runs fully offline: all inputs come from generate_synthetic_trajectories.py.
+"""
+
+import os
+import sys
+
+# Set matplotlib backend BEFORE any other imports
+os.environ['MPLBACKEND'] = 'Agg'
+
+import argparse
+import contextlib
+import gc
+import hashlib
+import io
+import json
+import multiprocessing
+import platform
+import resource
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from evo.core.metrics import Unit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import evaluate_trajectories as ev
+from generate_synthetic_trajectories import generate_trajectory_pair
+
+# Generator settings used for every size (num_poses / est_stride come from the CLI)
+GENERATOR_DEFAULTS = {
+    'rate_hz': 200.0,
+    'drift': 0.01,
+    'noise': 0.005,
+    'yaw_offset': 0.3,
+    'seed': 0,
+}
+
+# Evaluation stages in pipeline order
+STAGES = [
+    'load_groundtruth',
+    'load_estimate',
+    'compute_ate',
+    'compute_rpe',
+    'plot_trajectories_3d',
+    'plot_trajectories_2d',
+    'plot_ate_over_time',
+    'plot_rpe_over_time',
+    'plot_xyz_errors',
+]
+
+
+def build_stage_calls(gt_file, est_file, plot_dir, stages=STAGES):
+    """
+    Run the part of the pipeline that `stages` depend on and return a
+    zero-argument callable per stage. Each callable reuses the outputs of
+    earlier stages, so it measures only its own stage.
+    """
+    traj_gt = traj_est = ate_metric = traj_ref_sync = traj_est_sync = rpe_metric = None
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        if any(not stage.startswith('load_') for stage in stages):
+            traj_gt = ev.load_euroc_groundtruth(gt_file)
+            traj_est = ev.load_basalt_trajectory(est_file)
+        if any(stage.startswith('plot_') for stage in stages):
+            ate_metric, traj_ref_sync, traj_est_sync, _ = ev.compute_ate(traj_gt, traj_est)
+        if 'plot_rpe_over_time' in stages:
+            rpe_metric = ev.compute_rpe(traj_gt, traj_est, delta=1.0, delta_unit=Unit.meters)
+
+    plot_dir = Path(plot_dir)
+
+    calls = {
+        'load_groundtruth': lambda: ev.load_euroc_groundtruth(gt_file),
+        'load_estimate': lambda: ev.load_basalt_trajectory(est_file),
+        'compute_ate': lambda: ev.compute_ate(traj_gt, traj_est),
+        'compute_rpe': lambda: ev.compute_rpe(traj_gt, traj_est, delta=1.0,
+                                              delta_unit=Unit.meters),
+        'plot_trajectories_3d': lambda: ev.plot_trajectories_3d(
+            traj_ref_sync, traj_est_sync, plot_dir / 'trajectory_3d.png', 'benchmark'),
+        'plot_trajectories_2d': lambda: ev.plot_trajectories_2d(
+            traj_ref_sync, traj_est_sync, plot_dir / 'trajectory_2d.png', 'benchmark'),
+        'plot_ate_over_time': lambda: ev.plot_ate_over_time(
+            ate_metric, traj_ref_sync, plot_dir / 'ate_over_time.png', 'benchmark'),
+        'plot_rpe_over_time': lambda: ev.plot_rpe_over_time(
+            rpe_metric, traj_ref_sync, plot_dir / 'rpe_over_time.png', 'benchmark'),
+        'plot_xyz_errors': lambda: ev.plot_xyz_errors(
+            traj_ref_sync, traj_est_sync, plot_dir / 'xyz_errors.png', 'benchmark'),
+    }
+    return {stage: calls[stage] for stage in stages}
+
+
+def time_stage(func, rounds):
+    """Time a stage over several rounds, pytest-benchmark style."""
+    times = []
+    for _ in range(rounds):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+
+    times = np.array(times)
+    return {
+        'min': float(np.min(times)),
+        'max': float(np.max(times)),
+        'mean': float(np.mean(times)),
+        'median': float(np.median(times)),
+        'stddev': float(np.std(times)),
+        'rounds': rounds
+    }
+
+
+def measure_heap_peak(func):
+    """
+    Peak Python/numpy heap allocation of a single stage run [bytes].
+    tracemalloc does not see native buffers (matplotlib Agg, Pillow), so this
+    complements measure_stage_rss_growth rather than replacing it.
+    Done in a separate round because tracemalloc slows execution down.
+    """
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return int(peak)
+
+
+def _max_rss_bytes():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def _rss_child(func, conn):
+    # A forked child starts with its RSS high-water mark at the current RSS,
+    # so the growth of ru_maxrss is the stage's own peak, native buffers included
+    start = _max_rss_bytes()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()
+    conn.send(_max_rss_bytes() - start)
+    conn.close()
+
+
+def _run_child(ctx, target, args):
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=target, args=args + (child_conn,))
+    proc.start()
+    child_conn.close()
+    try:
+        result = parent_conn.recv()
+    except EOFError:
+        raise RuntimeError(f'Memory measurement child exited with code {proc.exitcode}')
+    finally:
+        proc.join()
+    return result
+
+
+def measure_rss_growth(func):
+    """Peak resident-set growth of a single stage run [bytes], measured in a forked child."""
+    return int(_run_child(multiprocessing.get_context('fork'), _rss_child, (func,)))
+
+
+def _stage_rss_child(stage, gt_file, est_file, plot_dir, conn):
+    # Only this stage's own inputs have been allocated in this interpreter
+    stage_call = build_stage_calls(gt_file, est_file, plot_dir, [stage])[stage]
+    gc.collect()
+    conn.send(measure_rss_growth(stage_call))
+    conn.close()
+
+
+def measure_stage_rss_growth(stage, gt_file, est_file, plot_dir):
+    """
+    RSS growth of one stage, measured from a fresh interpreter that builds
+    only that stage's inputs. A child forked from the benchmark process
+    would reuse heap pages left resident by earlier stages and sizes, so
+    its growth would depend on what ran before.
+    """
+    args = (stage, str(gt_file), str(est_file), str(plot_dir))
+    return int(_run_child(multiprocessing.get_context('spawn'), _stage_rss_child, args))
+
+
+def generator_params(num_poses, est_stride):
+    """Parameters that fully determine the synthetic inputs of one size."""
+    params = dict(GENERATOR_DEFAULTS)
+    params.update(num_poses=num_poses, est_stride=est_stride)
+    return params
+
+
+def prepare_inputs(work_dir, params):
+    """
+    Generate (or reuse) the synthetic pair for `params`. The directory name
+    carries a hash of the parameters and params.json records them, so files
+    produced with different settings are never reused.
+    """
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:10]
+    size_dir = Path(work_dir) / f"synthetic_{params['num_poses']}_{digest}"
+    gt_file = size_dir / 'gt.csv'
+    est_file = size_dir / 'traj.csv'
+    params_file = size_dir / 'params.json'
+
+    reusable = (gt_file.exists() and est_file.exists() and params_file.exists()
+                and json.loads(params_file.read_text()) == params)
+
+    if not reusable:
+        print("Generating synthetic trajectories...")
+        generate_trajectory_pair(gt_file, est_file, **params)
+        params_file.write_text(json.dumps(params, indent=2, sort_keys=True))
+
+    return size_dir, gt_file, est_file
+
+
+def run_benchmarks(sizes, stages, rounds, work_dir, est_stride=1):
+    """Benchmark every stage at every size and return the benchmark records."""
+    benchmarks = []
+
+    for n in sizes:
+        print(f"\n=== {n} poses ===")
+
+        params = generator_params(n, est_stride)
+        size_dir, gt_file, est_file = prepare_inputs(work_dir, params)
+
+        stage_calls = build_stage_calls(gt_file, est_file, size_dir, stages)
+
+        for stage in stages:
+            stats = time_stage(stage_calls[stage], rounds)
+            heap_peak = measure_heap_peak(stage_calls[stage])
+            rss_growth = measure_stage_rss_growth(stage, gt_file, est_file, size_dir)
+
+            print(f"  {stage:<22} median: {stats['median'] * 1e3:10.2f} ms"
+                  f"   heap peak: {heap_peak / 2**20:9.2f} MiB"
+                  f"   RSS growth: {rss_growth / 2**20:9.2f} MiB")
+
+            benchmarks.append({
+                'name': f'{stage}[{n}]',
+                'stage': stage,
+                'num_poses': n,
+                'inputs': params,
+                'stats': stats,
+                'heap_peak_bytes': heap_peak,
+                'rss_growth_bytes': rss_growth
+            })
+
+    return benchmarks
+
+
+def compare_to_baseline(benchmarks, baseline, threshold):
+    """
+    Compare median time, RSS growth and heap peak against a baseline.
+    Benchmarks whose synthetic inputs differ from the baseline's are not
+    compared. Returns (regressed names, mismatched names).
+    """
+    baseline_by_name = {b['name']: b for b in baseline['benchmarks']}
+    regressions = []
+    mismatches = []
+
+    print(f"\n{'='*80}")
+    print("COMPARISON AGAINST BASELINE")
+    print(f"{'='*80}")
+    print(f"{'benchmark':<36} {'time':>10} {'RSS':>10} {'heap':>10}")
+
+    for bench in benchmarks:
+        ref = baseline_by_name.get(bench['name'])
+        if ref is None:
+            print(f"{bench['name']:<36} {'(new)':>10}")
+            continue
+
+        if ref.get('inputs') != bench['inputs']:
+            print(f"{bench['name']:<36} (inputs differ from baseline, not compared)")
+            mismatches.append(bench['name'])
+            continue
+
+        ratios = [
+            bench['stats']['median'] / max(ref['stats']['median'], 1e-12),
+            bench['rss_growth_bytes'] / max(ref['rss_growth_bytes'], 1),
+            bench['heap_peak_bytes'] / max(ref['heap_peak_bytes'], 1),
+        ]
+
+        flag = ''
+        if any(r > 1.0 + threshold for r in ratios):
+            flag = '  <-- REGRESSION'
+            regressions.append(bench['name'])
+
+        print(f"{bench['name']:<36} " + ' '.join(f'{r:>9.2f}x' for r in ratios) + flag)
+
+    return regressions, mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark trajectory evaluation stages')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Synthetic ground-truth pose counts (up to 10^7)')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES,
+                        help='Stages to benchmark')
+    parser.add_argument('--rounds', type=int, default=3,
+                        help='Timed rounds per stage')
+    parser.add_argument('--est-stride', type=int, default=1,
+                        help='Keep every n-th pose in the synthetic estimate')
+    parser.add_argument('--work-dir', default=None,
+                        help='Directory for synthetic data and plots (default: temporary)')
+    parser.add_argument('--output', default='/workspace/results/benchmarks/benchmark_latest.json',
+                        help='Output JSON for this run')
+    parser.add_argument('--baseline', default='/workspace/results/benchmarks/baseline.json',
+                        help='Baseline JSON to compare against or save to')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Store this run as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed relative slowdown / memory growth before flagging')
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help='Exit with status 1 if any stage regressed')
+
+    args = parser.parse_args()
+
+    with contextlib.ExitStack() as stack:
+        work_dir = args.work_dir
+        if work_dir is None:
+            work_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix='vio_bench_'))
+
+        benchmarks = run_benchmarks(args.sizes, args.stages, args.rounds,
+                                    work_dir, est_stride=args.est_stride)
+
+    results = {
+        'machine_info': {
+            'node': platform.node(),
+            'processor': platform.processor(),
+            'machine': platform.machine(),
+            'python_version': platform.python_version(),
+            'numpy_version': np.__version__
+        },
+        'datetime': datetime.now().isoformat(),
+        'benchmarks': benchmarks
+    }
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    ev.save_results_json(results, args.output)
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        ev.save_results_json(results, baseline_path)
+        return
+
+    if not baseline_path.exists():
+        print(f"\nNo baseline found at {baseline_path} (use --save-baseline to create one)")
+        return
+
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    regressions, mismatches = compare_to_baseline(benchmarks, baseline, args.threshold)
+
+    if mismatches:
+        print(f"\nWARNING: {len(mismatches)} benchmark(s) use different synthetic inputs "
+              f"than the baseline; re-run with matching --est-stride or --save-baseline")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold * 100:.0f}%")
+        if args.fail_on_regression:
+            sys.exit(1)
+    else:
+        print("\nNo regressions.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,593 @@
+#!/usr/bin/env python3
+"""
+Node-distributed VIO evaluation via a shared SQLite work queue.
+
+A coordinator enqueues (sequence, config) jobs into a SQLite database on the
+shared results directory (e.g. NFS). Workers on any node claim jobs
+atomically under a lease, keep the lease alive with heartbeats while the job
+runs, and write outputs into the usual results/ layout. Jobs whose lease
+expires (crashed or disconnected worker) are claimed again by another worker.
+
+Each attempt writes into results/.staging/ and is moved into place only once
+the job is marked done, so a worker that lost its lease never overwrites the
+outputs of the worker that reclaimed the job. The job row records its staging
+directory until the move has finished; if a worker dies in between, the next
+worker to start or finish a job (or `collect`) completes the move.
+
+Leases use wall-clock time, so node clocks must be NTP-synchronised.
+
+Usage:
+  python3 scripts/distributed_evaluation.py enqueue --dataset all
+  python3 scripts/distributed_evaluation.py worker          # on every node
+  python3 scripts/distributed_evaluation.py status
+  python3 scripts/distributed_evaluation.py local --workers 4   # single machine
+"""
+
+import os
+import sys
+
+# Set matplotlib backend BEFORE any other imports
+os.environ['MPLBACKEND'] = 'Agg'
+
+import argparse
+import json
+import multiprocessing
+import shutil
+import socket
+import sqlite3
+import subprocess
+import tempfile
+import threading
+import time
+import traceback
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import evaluate_trajectories as ev
+
+# Paths (same as run_vio_tests.sh)
+BASALT_VIO = '/workspace/external/basalt/build/basalt_vio'
+CALIB_FILE = '/workspace/configs/my_euroc_calib.json'
+DEFAULT_CONFIG = '/workspace/external/basalt/data/euroc_config.json'
+RESULTS_DIR = '/workspace/results'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    sequence      TEXT    NOT NULL,
+    config        TEXT    NOT NULL,
+    kind          TEXT    NOT NULL,
+    status        TEXT    NOT NULL DEFAULT 'pending',
+    worker        TEXT,
+    lease_expires REAL,
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    max_attempts  INTEGER NOT NULL DEFAULT 3,
+    result        TEXT,
+    error         TEXT,
+    staging       TEXT,
+    created       REAL    NOT NULL,
+    updated       REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_expires);
+"""
+
+
+class WorkQueue:
+    """
+    SQLite-backed job queue with leases.
+
+    Every state change runs in a BEGIN IMMEDIATE transaction, which takes the
+    database write lock up front, so two workers can never claim the same job.
+    The default rollback journal is used because WAL mode needs shared memory
+    and does not work across NFS clients.
+    """
+
+    def __init__(self, db_path, timeout=60.0):
+        self.db_path = str(db_path)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, timeout=timeout, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=DELETE')
+        self.conn.executescript(SCHEMA)
+
+        columns = {row['name'] for row in self.conn.execute('PRAGMA table_info(jobs)')}
+        if 'staging' not in columns:
+            # Queue created before staged outputs were tracked
+            try:
+                self.conn.execute('ALTER TABLE jobs ADD COLUMN staging TEXT')
+            except sqlite3.OperationalError:
+                pass  # added concurrently by another worker
+
+    def close(self):
+        self.conn.close()
+
+    def _transaction(self, func):
+        """Run func(cursor) inside an immediate (write-locked) transaction."""
+        cur = self.conn.cursor()
+        cur.execute('BEGIN IMMEDIATE')
+        try:
+            result = func(cur)
+            cur.execute('COMMIT')
+            return result
+        except BaseException:
+            cur.execute('ROLLBACK')
+            raise
+
+    def enqueue(self, sequence, config, kind='vio', max_attempts=3):
+        """Add a job and return its id. Pending duplicates are not re-added."""
+        def op(cur):
+            cur.execute(
+                "SELECT id FROM jobs WHERE sequence = ? AND config = ? AND kind = ? "
+                "AND status IN ('pending', 'running')",
+                (sequence, config, kind)
+            )
+            row = cur.fetchone()
+            if row is not None:
+                return row['id']
+
+            now = time.time()
+            cur.execute(
+                "INSERT INTO jobs (sequence, config, kind, max_attempts, created, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (sequence, config, kind, max_attempts, now, now)
+            )
+            return cur.lastrowid
+
+        return self._transaction(op)
+
+    def claim(self, worker_id, lease_seconds):
+        """
+        Atomically claim the oldest pending job, or a running job whose lease
+        has expired. Returns the job row as a dict, or None.
+        """
+        def op(cur):
+            now = time.time()
+
+            # Expired leases that used up their attempts are failed for good
+            cur.execute(
+                "UPDATE jobs SET status = 'failed', worker = NULL, updated = ?, "
+                "error = COALESCE(error, 'lease expired') "
+                "WHERE status = 'running' AND lease_expires < ? AND attempts >= max_attempts",
+                (now, now)
+            )
+
+            cur.execute(
+                "SELECT * FROM jobs WHERE status = 'pending' "
+                "OR (status = 'running' AND lease_expires < ?) "
+                "ORDER BY id LIMIT 1",
+                (now,)
+            )
+            row = cur.fetchone()
+            if row is None:
+                return None
+
+            cur.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated = ? WHERE id = ?",
+                (worker_id, now + lease_seconds, now, row['id'])
+            )
+            job = dict(row)
+            job['attempts'] += 1
+            return job
+
+        return self._transaction(op)
+
+    def heartbeat(self, job_id, worker_id, lease_seconds):
+        """Extend the lease. Returns False if the job is no longer ours."""
+        def op(cur):
+            now = time.time()
+            cur.execute(
+                "UPDATE jobs SET lease_expires = ?, updated = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (now + lease_seconds, now, job_id, worker_id)
+            )
+            return cur.rowcount == 1
+
+        return self._transaction(op)
+
+    def complete(self, job_id, worker_id, result, staging=None):
+        """
+        Mark a job done and record the staging directory (name under
+        results/.staging) its outputs still have to be published from.
+        Returns False if the lease was lost meanwhile.
+        """
+        def op(cur):
+            cur.execute(
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL, "
+                "lease_expires = NULL, staging = ?, updated = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (json.dumps(result), staging, time.time(), job_id, worker_id)
+            )
+            return cur.rowcount == 1
+
+        return self._transaction(op)
+
+    def publish_done(self, results_dir):
+        """
+        Publish the staged outputs of every done job that still records a
+        staging directory, oldest job first, and clear the record. Runs under
+        the write lock so concurrent publishers never interleave their moves.
+        Returns the ids of the published jobs.
+        """
+        def op(cur):
+            cur.execute(
+                "SELECT id, staging FROM jobs WHERE status = 'done' "
+                "AND staging IS NOT NULL ORDER BY id"
+            )
+            published = []
+            for row in cur.fetchall():
+                staging_dir = Path(results_dir) / '.staging' / row['staging']
+                # Missing: a previous publisher moved everything but died
+                # before clearing the record
+                if staging_dir.is_dir():
+                    publish_staged(staging_dir, results_dir)
+                cur.execute("UPDATE jobs SET staging = NULL WHERE id = ?", (row['id'],))
+                published.append(row['id'])
+            return published
+
+        return self._transaction(op)
+
+    def fail(self, job_id, worker_id, error):
+        """Record a failure; the job is retried until max_attempts is reached."""
+        def op(cur):
+            cur.execute(
+                "UPDATE jobs SET "
+                "status = CASE WHEN attempts < max_attempts THEN 'pending' ELSE 'failed' END, "
+                "worker = NULL, lease_expires = NULL, error = ?, updated = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (error, time.time(), job_id, worker_id)
+            )
+            return cur.rowcount == 1
+
+        return self._transaction(op)
+
+    def counts(self):
+        """Number of jobs per status."""
+        rows = self.conn.execute(
+            "SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"
+        ).fetchall()
+        return {row['status']: row['n'] for row in rows}
+
+    def jobs(self):
+        return [dict(row) for row in self.conn.execute("SELECT * FROM jobs ORDER BY id")]
+
+    def has_unfinished(self):
+        counts = self.counts()
+        return counts.get('pending', 0) + counts.get('running', 0) > 0
+
+
+class Heartbeat(threading.Thread):
+    """Background thread that keeps a job's lease alive while it runs."""
+
+    def __init__(self, db_path, job_id, worker_id, lease_seconds):
+        super().__init__(daemon=True)
+        self.db_path = db_path
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.lost = threading.Event()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        # SQLite connections cannot be shared across threads
+        queue = WorkQueue(self.db_path)
+        try:
+            while not self._stop_event.wait(self.lease_seconds / 3.0):
+                if not queue.heartbeat(self.job_id, self.worker_id, self.lease_seconds):
+                    self.lost.set()
+                    return
+        finally:
+            queue.close()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def result_tag(sequence, config):
+    """Results file tag: the sequence name, suffixed with non-default configs."""
+    name = ev.DATASETS[sequence]['name'].lower()
+    if config == DEFAULT_CONFIG:
+        return name
+    return f'{name}_{Path(config).stem}'
+
+
+class LeaseLost(Exception):
+    """The job's lease expired and another worker may have reclaimed it."""
+
+
+# Result subdirectories a job may write (mirrors the results/ layout)
+RESULT_SUBDIRS = ('trajectories', 'groundtruth', 'stats', 'marg_data', 'evaluation')
+
+
+def staging_dir_for(job, worker_id, results_dir):
+    """
+    Per-attempt staging directory on the shared results filesystem. Jobs write
+    only here; outputs are moved into results/ after complete() succeeds, so a
+    worker that lost its lease never overwrites the new owner's files.
+    """
+    safe_worker = worker_id.replace(':', '_').replace('/', '_')
+    return Path(results_dir) / '.staging' / f"job{job['id']}_attempt{job['attempts']}_{safe_worker}"
+
+
+def publish_staged(staging_dir, results_dir):
+    """
+    Move staged outputs into results/, replacing previous outputs of the same
+    tag. Safe to re-run after an interruption: moved entries are gone from
+    the staging directory.
+    """
+    results_dir = Path(results_dir)
+    for sub in RESULT_SUBDIRS:
+        src_dir = staging_dir / sub
+        if not src_dir.is_dir():
+            continue
+        (results_dir / sub).mkdir(parents=True, exist_ok=True)
+        for src in src_dir.iterdir():
+            dst = results_dir / sub / src.name
+            if dst.is_dir():
+                shutil.rmtree(dst)
+            # Same filesystem, so this is an atomic rename
+            os.replace(src, dst)
+    shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+def run_vio(sequence, config, staging_dir, lease_lost):
+    """
+    Run basalt_vio for one sequence (same flags as run_vio_tests.sh).
+    Basalt writes trajectory.txt etc. into its working directory, so every job
+    runs in a private temporary directory; outputs are collected into the
+    staging directory. Basalt is killed as soon as the lease is lost.
+    """
+    dataset = ev.DATASETS[sequence]
+    tag = result_tag(sequence, config)
+
+    traj_output = staging_dir / 'trajectories' / f'traj_{tag}.csv'
+    stats_output = staging_dir / 'stats' / f'result_{tag}.json'
+    marg_dir = staging_dir / 'marg_data' / tag
+
+    for d in (traj_output.parent, stats_output.parent, marg_dir,
+              staging_dir / 'groundtruth'):
+        d.mkdir(parents=True, exist_ok=True)
+
+    with tempfile.TemporaryDirectory(prefix=f'vio_{tag}_') as work_dir:
+        proc = subprocess.Popen([
+            BASALT_VIO,
+            '--dataset-path', dataset['dataset_path'],
+            '--dataset-type', 'euroc',
+            '--cam-calib', CALIB_FILE,
+            '--config-path', config,
+            '--show-gui', '0',
+            '--use-imu', '1',
+            '--marg-data', str(marg_dir),
+            '--save-trajectory', 'tum',
+            '--result-path', str(stats_output)
+        ], cwd=work_dir)
+
+        while True:
+            try:
+                proc.wait(timeout=1.0)
+                break
+            except subprocess.TimeoutExpired:
+                if lease_lost.is_set():
+                    proc.kill()
+                    proc.wait()
+                    raise LeaseLost('basalt_vio killed')
+
+        if proc.returncode != 0:
+            raise subprocess.CalledProcessError(proc.returncode, BASALT_VIO)
+
+        work_dir = Path(work_dir)
+        if not (work_dir / 'trajectory.txt').exists():
+            raise RuntimeError('Trajectory file not generated')
+
+        shutil.move(str(work_dir / 'trajectory.txt'), str(traj_output))
+
+        if (work_dir / 'groundtruth.txt').exists():
+            shutil.move(str(work_dir / 'groundtruth.txt'),
+                        str(staging_dir / 'groundtruth' / f'gt_{tag}.csv'))
+
+        for stats_name in ('stats_vio', 'stats_sums', 'stats_all'):
+            stats_file = work_dir / f'{stats_name}.ubjson'
+            if stats_file.exists():
+                shutil.move(str(stats_file),
+                            str(staging_dir / 'stats' / f'{stats_name}_{tag}.ubjson'))
+
+    return traj_output
+
+
+def run_job(job, results_dir, staging_dir, lease_lost):
+    """Execute one job into staging_dir and return its evaluation results."""
+    sequence = job['sequence']
+    config = job['config']
+    dataset = ev.DATASETS[sequence]
+    tag = result_tag(sequence, config)
+    final_traj_file = Path(results_dir) / 'trajectories' / f'traj_{tag}.csv'
+
+    if job['kind'] == 'vio':
+        traj_file = run_vio(sequence, config, staging_dir, lease_lost)
+    else:
+        traj_file = final_traj_file
+
+    if not traj_file.exists():
+        raise FileNotFoundError(f'Trajectory file not found: {traj_file}')
+
+    if lease_lost.is_set():
+        raise LeaseLost('lease lost before evaluation')
+
+    dataset_name = dataset['name'] if tag == dataset['name'].lower() else tag
+    return ev.evaluate_dataset(dataset_name, traj_file, dataset['gt_file'],
+                               staging_dir / 'evaluation',
+                               traj_label=final_traj_file)
+
+
+def worker_loop(db_path, results_dir, lease_seconds=300.0, poll_interval=5.0,
+                exit_when_empty=False, worker_id=None):
+    """Claim and run jobs until the queue is drained (or forever)."""
+    worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+    queue = WorkQueue(db_path)
+
+    print(f"[{worker_id}] Worker started on {db_path}")
+
+    try:
+        # Finish publishing for workers that died after complete()
+        for job_id in queue.publish_done(results_dir):
+            print(f"[{worker_id}] Published outputs of job {job_id}")
+
+        while True:
+            job = queue.claim(worker_id, lease_seconds)
+
+            if job is None:
+                if exit_when_empty and not queue.has_unfinished():
+                    print(f"[{worker_id}] Queue drained, exiting")
+                    return
+                time.sleep(poll_interval)
+                continue
+
+            print(f"[{worker_id}] Claimed job {job['id']}: {job['kind']} "
+                  f"{job['sequence']} (attempt {job['attempts']}/{job['max_attempts']})")
+
+            staging_dir = staging_dir_for(job, worker_id, results_dir)
+            staging_dir.mkdir(parents=True, exist_ok=True)
+
+            heartbeat = Heartbeat(db_path, job['id'], worker_id, lease_seconds)
+            heartbeat.start()
+            try:
+                results = run_job(job, results_dir, staging_dir, heartbeat.lost)
+            except LeaseLost as e:
+                heartbeat.stop()
+                shutil.rmtree(staging_dir, ignore_errors=True)
+                print(f"[{worker_id}] Lost lease on job {job['id']} ({e}), attempt abandoned")
+                continue
+            except Exception:
+                heartbeat.stop()
+                shutil.rmtree(staging_dir, ignore_errors=True)
+                error = traceback.format_exc()
+                print(f"[{worker_id}] Job {job['id']} failed:\n{error}")
+                queue.fail(job['id'], worker_id, error)
+                continue
+
+            heartbeat.stop()
+            if heartbeat.lost.is_set() or not queue.complete(job['id'], worker_id, results,
+                                                             staging=staging_dir.name):
+                shutil.rmtree(staging_dir, ignore_errors=True)
+                print(f"[{worker_id}] Lost lease on job {job['id']}, outputs discarded")
+            else:
+                queue.publish_done(results_dir)
+                print(f"[{worker_id}] Job {job['id']} done")
+    finally:
+        queue.close()
+
+
+def collect_results(db_path, results_dir):
+    """Write all_results.json from finished jobs, like evaluate_trajectories.py."""
+    queue = WorkQueue(db_path)
+    try:
+        # Done must mean the outputs are in results/
+        queue.publish_done(results_dir)
+        all_results = [json.loads(job['result']) for job in queue.jobs()
+                       if job['status'] == 'done' and job['result']]
+    finally:
+        queue.close()
+
+    if all_results:
+        ev.save_results_json(all_results, Path(results_dir) / 'evaluation' / 'all_results.json')
+    return all_results
+
+
+def print_status(db_path):
+    queue = WorkQueue(db_path)
+    try:
+        print(f"\n{'='*80}")
+        print(f"QUEUE STATUS: {db_path}")
+        print(f"{'='*80}")
+        now = time.time()
+        for job in queue.jobs():
+            lease = ''
+            if job['status'] == 'running' and job['lease_expires'] is not None:
+                lease = f" lease {job['lease_expires'] - now:+.0f}s"
+            print(f"  [{job['id']:3d}] {job['status']:<8} {job['kind']:<8} "
+                  f"{result_tag(job['sequence'], job['config']):<30} "
+                  f"attempts {job['attempts']}/{job['max_attempts']}"
+                  f"{' on ' + job['worker'] if job['worker'] else ''}{lease}")
+        print(f"\n  {queue.counts()}")
+    finally:
+        queue.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Distributed VIO evaluation work queue')
+    parser.add_argument('--queue', default=os.path.join(RESULTS_DIR, 'queue.sqlite'),
+                        help='Shared SQLite queue file')
+    parser.add_argument('--results-dir', default=RESULTS_DIR,
+                        help='Shared results directory')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_enqueue = sub.add_parser('enqueue', help='Enqueue (sequence, config) jobs')
+    p_enqueue.add_argument('--dataset', choices=list(ev.DATASETS) + ['all'], default='all')
+    p_enqueue.add_argument('--config', nargs='+', default=[DEFAULT_CONFIG],
+                           help='Basalt config files (one job per sequence and config)')
+    p_enqueue.add_argument('--kind', choices=['vio', 'evaluate'], default='vio',
+                           help='vio: run basalt_vio then evaluate; evaluate: existing trajectories only')
+    p_enqueue.add_argument('--max-attempts', type=int, default=3)
+
+    for name, help_text in (('worker', 'Run a worker on this node'),
+                            ('local', 'Run several worker processes on this machine')):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument('--lease', type=float, default=300.0,
+                       help='Lease duration [s], renewed every lease/3')
+        p.add_argument('--poll-interval', type=float, default=5.0)
+        if name == 'worker':
+            p.add_argument('--exit-when-empty', action='store_true',
+                           help='Exit once no pending or running jobs remain')
+        else:
+            p.add_argument('--workers', type=int, default=2,
+                           help='Number of worker processes')
+
+    sub.add_parser('status', help='Show queue contents')
+    sub.add_parser('collect', help='Write evaluation/all_results.json from finished jobs')
+
+    args = parser.parse_args()
+
+    if args.command == 'enqueue':
+        sequences = list(ev.DATASETS) if args.dataset == 'all' else [args.dataset]
+        queue = WorkQueue(args.queue)
+        try:
+            for sequence in sequences:
+                for config in args.config:
+                    job_id = queue.enqueue(sequence, config, args.kind, args.max_attempts)
+                    print(f"Enqueued job {job_id}: {args.kind} {result_tag(sequence, config)}")
+        finally:
+            queue.close()
+
+    elif args.command == 'worker':
+        worker_loop(args.queue, args.results_dir, args.lease, args.poll_interval,
+                    args.exit_when_empty)
+
+    elif args.command == 'local':
+        # Worker processes stand in for separate nodes
+        processes = [
+            multiprocessing.Process(
+                target=worker_loop,
+                args=(args.queue, args.results_dir, args.lease, args.poll_interval, True),
+                kwargs={'worker_id': f'{socket.gethostname()}:local{i}'}
+            )
+            for i in range(args.workers)
+        ]
+        for p in processes:
+            p.start()
+        for p in processes:
+            p.join()
+
+        collect_results(args.queue, args.results_dir)
+        print_status(args.queue)
+
+    elif args.command == 'status':
+        print_status(args.queue)
+
+    elif args.command == 'collect':
+        collect_results(args.queue, args.results_dir)
+
+
+if __name__ == '__main__':
+    main()
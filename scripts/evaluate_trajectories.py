@@ -12,9 +12,11 @@ os.environ['MPLBACKEND'] = 'Agg'
 
 import argparse
 import copy
+import json
 import pandas as pd
 import numpy as np
 from pathlib import Path
+from types import SimpleNamespace
 from evo.core import sync
 from evo.core.trajectory import PoseTrajectory3D
 from evo.core.metrics import PoseRelation, Unit
@@ -31,6 +33,25 @@ COLORS = {
     'error': '#d62728'    # Red
 }
 
+# Per-sequence archive of raw per-pose series (see save_error_series)
+SERIES_FILENAME = 'error_series.npz'
+
+# Dataset configurations
+DATASETS = {
+    'mh_01': {
+        'name': 'MH_01_easy',
+        'dataset_path': '/workspace/data/MH_01_easy',
+        'traj_file': '/workspace/results/trajectories/traj_mh_01_easy.csv',
+        'gt_file': '/workspace/data/MH_01_easy/mav0/state_groundtruth_estimate0/data.csv'
+    },
+    'v1_03': {
+        'name': 'V1_03_difficult',
+        'dataset_path': '/workspace/data/V1_03_difficult',
+        'traj_file': '/workspace/results/trajectories/traj_v1_03_difficult.csv',
+        'gt_file': '/workspace/data/V1_03_difficult/mav0/state_groundtruth_estimate0/data.csv'
+    }
+}
+
 
 def load_euroc_groundtruth(gt_file):
     """Load EuRoC ground truth data and convert to PoseTrajectory3D."""
@@ -107,7 +128,12 @@ def compute_ate(traj_ref, traj_est):
     # CRITICAL: Align trajectories using SE(3) Umeyama alignment (no scale correction)
     # This removes the systematic offset due to calibration errors
     print("Applying SE(3) Umeyama alignment...")
-    traj_est_sync.align(traj_ref_sync, correct_scale=False, correct_only_scale=False)
+    r_a, t_a, _ = traj_est_sync.align(traj_ref_sync, correct_scale=False, correct_only_scale=False)
+    
+    # Homogeneous alignment transform (estimate frame -> GT frame)
+    T_align = np.eye(4)
+    T_align[:3, :3] = r_a
+    T_align[:3, 3] = t_a
     
     # Compute ATE after alignment
     ate_metric = metrics.APE(metrics.PoseRelation.translation_part)
@@ -123,7 +149,7 @@ def compute_ate(traj_ref, traj_est):
     print(f"  Min:    {ate_stats['min']:.6f} m")
     print(f"  Max:    {ate_stats['max']:.6f} m")
     
-    return ate_metric, traj_ref_sync, traj_est_sync
+    return ate_metric, traj_ref_sync, traj_est_sync, T_align
 
 
 def compute_rpe(traj_ref, traj_est, delta=1.0, delta_unit=Unit.meters):
@@ -302,10 +328,16 @@ def plot_rpe_over_time(rpe_metric, traj_ref_sync, output_path, dataset_name):
     
     # Extract errors
     errors = rpe_metric.error
-    timestamps = traj_ref_sync.timestamps[: len(errors)]
     
-    # Normalize timestamps to start from 0
-    timestamps_rel = timestamps - timestamps[0]
+    # evo's delta_ids: synced index of the pose closing each RPE pair
+    delta_ids = getattr(rpe_metric, 'delta_ids', None)
+    if delta_ids is not None:
+        timestamps = traj_ref_sync.timestamps[np.asarray(delta_ids, dtype=np.int64)]
+    else:
+        timestamps = traj_ref_sync.timestamps[: len(errors)]
+    
+    # Normalize timestamps to start from 0 (same origin as the other plots)
+    timestamps_rel = timestamps - traj_ref_sync.timestamps[0]
     
     ax.plot(timestamps_rel, errors, color=COLORS['error'], linewidth=1.5, alpha=0.8)
     ax.axhline(y=np.mean(errors), color='black', linestyle='--',
@@ -382,8 +414,103 @@ def save_results_json(results, output_path):
     print("  Done!")
 
 
-def evaluate_dataset(dataset_name, traj_file, gt_file, output_dir):
-    """Evaluate a single dataset."""
+def save_error_series(output_path, traj_ref_sync, traj_est_sync, ate_metric,
+                      rpe_metric, T_align, results):
+    """
+    Save per-pose series of one sequence to a compressed columnar archive:
+    synced timestamps, GT and aligned estimate positions, ATE/RPE/XYZ errors,
+    the synced pose index closing each RPE pair (evo's delta_ids), the SE(3)
+    alignment transform and the summary results.
+    """
+    print(f"\nSaving error series to: {output_path}")
+    
+    np.savez_compressed(
+        output_path,
+        timestamps=traj_ref_sync.timestamps,
+        positions_ref=traj_ref_sync.positions_xyz,
+        positions_est_aligned=traj_est_sync.positions_xyz,
+        ate_errors=np.asarray(ate_metric.error),
+        rpe_errors=np.asarray(rpe_metric.error),
+        rpe_pair_ids=np.asarray(rpe_metric.delta_ids, dtype=np.int64),
+        xyz_errors=traj_est_sync.positions_xyz - traj_ref_sync.positions_xyz,
+        T_align=T_align,
+        results_json=np.array(json.dumps(results))
+    )
+    
+    print("  Done!")
+
+
+def load_error_series(series_path):
+    """
+    Open a series archive. Columns are decompressed lazily on first access,
+    so rendering a single plot only reads the arrays it needs.
+    """
+    return np.load(series_path, allow_pickle=False)
+
+
+def replot_dataset(dataset_name, output_dir, plots=True):
+    """
+    Regenerate plots and reports of a single dataset from its series archive,
+    without re-running synchronization, alignment or metrics.
+    """
+    dataset_output_dir = Path(output_dir) / dataset_name.lower().replace(' ', '_')
+    series_path = dataset_output_dir / SERIES_FILENAME
+    
+    print(f"\n{'='*80}")
+    print(f"{'REPLOTTING' if plots else 'REPORTING'}: {dataset_name}")
+    print(f"{'='*80}")
+    print(f"Loading error series from: {series_path}")
+    
+    series = load_error_series(series_path)
+    
+    # Lightweight stand-ins for the evo trajectory/metric objects: the plot and
+    # report functions only read positions_xyz, timestamps and error
+    traj_ref_sync = SimpleNamespace(positions_xyz=series['positions_ref'],
+                                    timestamps=series['timestamps'])
+    traj_est_sync = SimpleNamespace(positions_xyz=series['positions_est_aligned'],
+                                    timestamps=series['timestamps'])
+    ate_metric = SimpleNamespace(error=series['ate_errors'])
+    
+    if plots:
+        rpe_metric = SimpleNamespace(error=series['rpe_errors'])
+        if 'rpe_pair_ids' in series.files:
+            rpe_metric.delta_ids = series['rpe_pair_ids']
+        
+        plot_trajectories_3d(traj_ref_sync, traj_est_sync,
+                             dataset_output_dir / 'trajectory_3d.png',
+                             dataset_name)
+        
+        plot_trajectories_2d(traj_ref_sync, traj_est_sync,
+                             dataset_output_dir / 'trajectory_2d.png',
+                             dataset_name)
+        
+        plot_ate_over_time(ate_metric, traj_ref_sync,
+                           dataset_output_dir / 'ate_over_time.png',
+                           dataset_name)
+        
+        plot_rpe_over_time(rpe_metric, traj_ref_sync,
+                           dataset_output_dir / 'rpe_over_time.png',
+                           dataset_name)
+        
+        plot_xyz_errors(traj_ref_sync, traj_est_sync,
+                        dataset_output_dir / 'xyz_errors.png',
+                        dataset_name)
+    
+    results = json.loads(str(series['results_json']))
+    save_results_json(results, dataset_output_dir / 'evaluation_results.json')
+    
+    analyze_worst_errors(ate_metric, traj_ref_sync, dataset_name, dataset_output_dir)
+    
+    series.close()
+    
+    return results
+
+
+def evaluate_dataset(dataset_name, traj_file, gt_file, output_dir, traj_label=None):
+    """
+    Evaluate a single dataset.
+    traj_label: trajectory path recorded in the results (defaults to traj_file).
+    """
     
     print(f"\n{'='*80}")
     print(f"EVALUATING: {dataset_name}")
@@ -398,7 +525,7 @@ def evaluate_dataset(dataset_name, traj_file, gt_file, output_dir):
     traj_est = load_basalt_trajectory(traj_file)
     
     # Compute metrics
-    ate_metric, traj_ref_sync, traj_est_sync = compute_ate(traj_gt, traj_est)
+    ate_metric, traj_ref_sync, traj_est_sync, T_align = compute_ate(traj_gt, traj_est)
     rpe_metric = compute_rpe(traj_gt, traj_est, delta=1.0, delta_unit=Unit.meters)
     
     # Generate plots
@@ -428,7 +555,7 @@ def evaluate_dataset(dataset_name, traj_file, gt_file, output_dir):
     
     results = {
         'dataset': dataset_name,
-        'trajectory_file': str(traj_file),
+        'trajectory_file': str(traj_label or traj_file),
         'groundtruth_file': str(gt_file),
         'num_poses_original_gt': len(traj_gt.timestamps),
         'num_poses_original_est': len(traj_est.timestamps),
@@ -455,6 +582,11 @@ def evaluate_dataset(dataset_name, traj_file, gt_file, output_dir):
     # Save results
     save_results_json(results, dataset_output_dir / 'evaluation_results.json')
     
+    # Persist raw per-pose series so plots/reports can be regenerated with --replot
+    save_error_series(dataset_output_dir / SERIES_FILENAME,
+                      traj_ref_sync, traj_est_sync, ate_metric, rpe_metric,
+                      T_align, results)
+    
     # --- UPDATED: Save Root Cause Analysis to file ---
     # Передаем dataset_output_dir
     analyze_worst_errors(ate_metric, traj_ref_sync, dataset_name, dataset_output_dir)
@@ -523,37 +655,38 @@ def analyze_worst_errors(ate_metric, traj_ref_sync, dataset_name, output_dir, to
 
 def main():
     parser = argparse.ArgumentParser(description='Evaluate VIO trajectories')
-    parser.add_argument('--dataset', choices=['mh_01', 'v1_03', 'all'], default='all',
+    parser.add_argument('--dataset', choices=list(DATASETS) + ['all'], default='all',
                         help='Dataset to evaluate')
     parser.add_argument('--output-dir', default='/workspace/results/evaluation',
                         help='Output directory for results')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--replot', action='store_true',
+                      help=f'Regenerate plots and reports from saved {SERIES_FILENAME}')
+    mode.add_argument('--report-only', action='store_true',
+                      help=f'Regenerate reports (no plots) from saved {SERIES_FILENAME}')
     
     args = parser.parse_args()
     
-    # Dataset configurations
-    datasets = {
-        'mh_01': {
-            'name': 'MH_01_easy',
-            'traj_file': '/workspace/results/trajectories/traj_mh_01_easy.csv',
-            'gt_file': '/workspace/data/MH_01_easy/mav0/state_groundtruth_estimate0/data.csv'
-        },
-        'v1_03': {
-            'name': 'V1_03_difficult',
-            'traj_file': '/workspace/results/trajectories/traj_v1_03_difficult.csv',
-            'gt_file': '/workspace/data/V1_03_difficult/mav0/state_groundtruth_estimate0/data.csv'
-        }
-    }
-    
     # Run evaluations
     all_results = []
     
     if args.dataset == 'all':
-        datasets_to_eval = datasets.keys()
+        datasets_to_eval = DATASETS.keys()
     else:
         datasets_to_eval = [args.dataset]
     
     for dataset_key in datasets_to_eval:
-        config = datasets[dataset_key]
+        config = DATASETS[dataset_key]
+        
+        if args.replot or args.report_only:
+            series_path = (Path(args.output_dir) / config['name'].lower() / SERIES_FILENAME)
+            if not series_path.exists():
+                print(f"ERROR: Error series not found: {series_path}")
+                continue
+            
+            all_results.append(replot_dataset(config['name'], args.output_dir,
+                                              plots=args.replot))
+            continue
         
         # Check if files exist
         if not Path(config['traj_file']).exists():
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Synthetic trajectory generator for evaluator benchmarking.
+Writes ground-truth / estimate pairs in EuRoC GT and Basalt TUM formats
+with controlled drift, noise, rate and length.
+"""
+
+import argparse
+import numpy as np
+from pathlib import Path
+
+# EuRoC state_groundtruth_estimate0/data.csv header
+EUROC_GT_HEADER = (
+    '#timestamp, p_RS_R_x [m], p_RS_R_y [m], p_RS_R_z [m], '
+    'q_RS_w [], q_RS_x [], q_RS_y [], q_RS_z [], '
+    'v_RS_R_x [m s^-1], v_RS_R_y [m s^-1], v_RS_R_z [m s^-1], '
+    'b_w_RS_S_x [rad s^-1], b_w_RS_S_y [rad s^-1], b_w_RS_S_z [rad s^-1], '
+    'b_a_RS_S_x [m s^-2], b_a_RS_S_y [m s^-2], b_a_RS_S_z [m s^-2]'
+)
+
+EUROC_GT_DTYPE = np.dtype(
+    [('timestamp', np.int64)]
+    + [(name, np.float64) for name in (
+        'px', 'py', 'pz', 'qw', 'qx', 'qy', 'qz', 'vx', 'vy', 'vz',
+        'bwx', 'bwy', 'bwz', 'bax', 'bay', 'baz')]
+)
+
+# Basalt --save-trajectory tum header
+BASALT_TUM_HEADER = '# timestamp tx ty tz qx qy qz qw'
+
+# Poses generated and written per chunk (keeps memory flat up to 10^7 poses)
+CHUNK_SIZE = 250_000
+
+# Start of MH_01_easy, so synthetic timestamps look like real EuRoC ones
+DEFAULT_START_NS = 1403636579758555392
+
+
+def flight_path(t):
+    """
+    Smooth Lissajous-style flight path sampled at times t [s].
+    Returns positions (N, 3), yaw (N,) and velocities (N, 3).
+    """
+    w = 2.0 * np.pi / np.array([40.0, 27.0, 15.0])
+    amp = np.array([4.0, 3.0, 0.5])
+    offset = np.array([0.0, 0.0, 1.2])
+
+    phase = t[:, None] * w
+    positions = amp * np.sin(phase) + offset
+    velocities = amp * w * np.cos(phase)
+
+    # Heading follows the horizontal velocity direction
+    yaw = np.arctan2(velocities[:, 1], velocities[:, 0])
+
+    return positions, yaw, velocities
+
+
+def yaw_to_quat_wxyz(yaw):
+    """Convert yaw angles [rad] to (N, 4) quaternions in wxyz order."""
+    quats = np.zeros((len(yaw), 4))
+    quats[:, 0] = np.cos(yaw / 2.0)
+    quats[:, 3] = np.sin(yaw / 2.0)
+    return quats
+
+
+def generate_trajectory_pair(gt_file, est_file, num_poses, rate_hz=200.0,
+                             est_stride=1, drift=0.01, noise=0.005,
+                             yaw_offset=0.3, seed=0):
+    """
+    Generate a synthetic GT/estimate pair and write both files.
+
+    num_poses   -- number of ground-truth poses
+    rate_hz     -- ground-truth rate
+    est_stride  -- keep every n-th pose in the estimate (20 Hz Basalt output = 10)
+    drift       -- random-walk position drift [m / sqrt(s)]
+    noise       -- white position noise std [m]
+    yaw_offset  -- constant yaw of the estimate frame (exercises SE(3) alignment)
+    """
+    rng = np.random.default_rng(seed)
+    dt = 1.0 / rate_hz
+    dt_ns = int(round(1e9 / rate_hz))
+
+    # Rigid offset between the GT world frame and the estimator's frame
+    c, s = np.cos(yaw_offset), np.sin(yaw_offset)
+    R_off = np.array([[c, -s, 0.0], [s, c, 0.0], [0.0, 0.0, 1.0]])
+    t_off = np.array([0.5, -0.3, 0.1])
+
+    Path(gt_file).parent.mkdir(parents=True, exist_ok=True)
+    Path(est_file).parent.mkdir(parents=True, exist_ok=True)
+
+    drift_state = np.zeros(3)
+    num_est = 0
+
+    with open(gt_file, 'w') as f_gt, open(est_file, 'w') as f_est:
+        f_gt.write(EUROC_GT_HEADER + '\n')
+        f_est.write(BASALT_TUM_HEADER + '\n')
+
+        for start in range(0, num_poses, CHUNK_SIZE):
+            idx = np.arange(start, min(start + CHUNK_SIZE, num_poses))
+            t = idx * dt
+            timestamps_ns = DEFAULT_START_NS + idx.astype(np.int64) * dt_ns
+
+            positions, yaw, velocities = flight_path(t)
+            quat_gt = yaw_to_quat_wxyz(yaw)
+
+            # Ground truth (EuRoC): timestamp[ns], p, q_wxyz, v, b_w, b_a
+            # Structured rows keep the int64 nanosecond timestamps exact
+            gt_rows = np.zeros(len(idx), dtype=EUROC_GT_DTYPE)
+            gt_rows['timestamp'] = timestamps_ns
+            for i, name in enumerate(EUROC_GT_DTYPE.names[1:4]):
+                gt_rows[name] = positions[:, i]
+            for i, name in enumerate(EUROC_GT_DTYPE.names[4:8]):
+                gt_rows[name] = quat_gt[:, i]
+            for i, name in enumerate(EUROC_GT_DTYPE.names[8:11]):
+                gt_rows[name] = velocities[:, i]
+            np.savetxt(f_gt, gt_rows, fmt=['%d'] + ['%.9f'] * 16, delimiter=',')
+
+            # Estimate: accumulate drift over every GT step, then subsample
+            steps = rng.normal(0.0, drift * np.sqrt(dt), size=(len(idx), 3))
+            drift_path = drift_state + np.cumsum(steps, axis=0)
+            drift_state = drift_path[-1]
+
+            keep = idx % est_stride == 0
+            if not np.any(keep):
+                continue
+
+            pos_est = positions[keep] + drift_path[keep]
+            pos_est += rng.normal(0.0, noise, size=pos_est.shape)
+            pos_est = pos_est @ R_off.T + t_off
+
+            quat_est = yaw_to_quat_wxyz(yaw[keep] + yaw_offset)
+
+            # Basalt TUM: timestamp[s], t, q_xyzw
+            est_rows = np.column_stack([
+                timestamps_ns[keep] / 1e9,
+                pos_est,
+                quat_est[:, [1, 2, 3, 0]]
+            ])
+            np.savetxt(f_est, est_rows, fmt='%.18e', delimiter=' ')
+            num_est += int(np.count_nonzero(keep))
+
+    return num_poses, num_est
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic GT/estimate trajectory pairs')
+    parser.add_argument('--num-poses', type=int, nargs='+', default=[1000],
+                        help='Ground-truth pose counts (one pair per value)')
+    parser.add_argument('--output-dir', default='/workspace/results/synthetic',
+                        help='Output directory for generated files')
+    parser.add_argument('--rate', type=float, default=200.0,
+                        help='Ground-truth rate [Hz]')
+    parser.add_argument('--est-stride', type=int, default=1,
+                        help='Keep every n-th pose in the estimate')
+    parser.add_argument('--drift', type=float, default=0.01,
+                        help='Random-walk drift [m / sqrt(s)]')
+    parser.add_argument('--noise', type=float, default=0.005,
+                        help='White position noise std [m]')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Random seed')
+
+    args = parser.parse_args()
+
+    output_dir = Path(args.output_dir)
+
+    for n in args.num_poses:
+        gt_file = output_dir / f'gt_synthetic_{n}.csv'
+        est_file = output_dir / f'traj_synthetic_{n}.csv'
+
+        print(f"Generating {n} poses...")
+        num_gt, num_est = generate_trajectory_pair(
+            gt_file, est_file, n,
+            rate_hz=args.rate,
+            est_stride=args.est_stride,
+            drift=args.drift,
+            noise=args.noise,
+            seed=args.seed
+        )
+        print(f"  Ground truth: {gt_file} ({num_gt} poses)")
+        print(f"  Estimate:     {est_file} ({num_est} poses)")
+
+
+if __name__ == '__main__':
+    main()
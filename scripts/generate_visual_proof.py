@@ -3,16 +3,77 @@ import pandas as pd
 import numpy as np
 import os
 import glob
-from PIL import Image
+import argparse
+from PIL import Image, ImageDraw
 
+from calibration import load_calibration, project_future_trajectory
 
-def generate_visual_proof(traj_file, image_dir, output_file):
+# Overlay colors (same as evaluate_trajectories.py)
+OVERLAY_COLORS = {"gt": (31, 119, 180), "est": (255, 127, 14)}
+
+
+def load_tum_trajectory(traj_file):
+    """Load a Basalt TUM trajectory as (timestamps [s], positions, quats wxyz)."""
+    df = pd.read_csv(traj_file, sep=r"\s+", comment="#", header=None)
+    quats = df.iloc[:, [7, 4, 5, 6]].values  # qw, qx, qy, qz
+    return df.iloc[:, 0].values, df.iloc[:, 1:4].values, quats
+
+
+def load_euroc_gt(gt_file):
+    """Load EuRoC ground truth as (timestamps [s], positions, quats wxyz)."""
+    df = pd.read_csv(gt_file, comment="#", header=None)
+    return df.iloc[:, 0].values / 1e9, df.iloc[:, 1:4].values, df.iloc[:, 4:8].values
+
+
+def project_overlays(camera, frame_times, traj_file, gt_file=None, horizon=3.0):
+    """
+    Project future estimated (and GT) trajectories into every frame at once.
+    Returns {"est": (uv, valid), "gt": (uv, valid)}.
+    """
+    overlays = {"est": project_future_trajectory(
+        camera, frame_times, *load_tum_trajectory(traj_file), horizon=horizon)}
+    if gt_file is not None:
+        overlays["gt"] = project_future_trajectory(
+            camera, frame_times, *load_euroc_gt(gt_file), horizon=horizon)
+    return overlays
+
+
+def render_overlay_frames(traj_file, image_dir, output_dir, calib_file,
+                          gt_file=None, horizon=3.0):
+    """Write every cam0 frame with the future trajectories drawn on top."""
+    image_files = sorted(glob.glob(os.path.join(image_dir, "*.png")))
+    if not image_files:
+        print(f"No images found in {image_dir}")
+        return
+
+    frame_times = np.array(
+        [int(os.path.basename(f).split(".")[0]) for f in image_files]) / 1e9
+
+    camera = load_calibration(calib_file)[0]
+    overlays = project_overlays(camera, frame_times, traj_file, gt_file, horizon)
+
+    os.makedirs(output_dir, exist_ok=True)
+    print(f"Rendering {len(image_files)} overlay frames to {output_dir}...")
+
+    for i, image_file in enumerate(image_files):
+        img = Image.open(image_file).convert("RGB")
+        draw = ImageDraw.Draw(img)
+        for name, (uv, valid) in overlays.items():
+            points = [tuple(p) for p in uv[i][valid[i]]]
+            if len(points) > 1:
+                draw.line(points, fill=OVERLAY_COLORS[name], width=2)
+        img.save(os.path.join(output_dir, os.path.basename(image_file)))
+
+    print("Done.")
+
+
+def generate_visual_proof(traj_file, image_dir, output_file, calib_file=None, gt_file=None):
     print(f"Loading trajectory from {traj_file}...")
     # Load trajectory (TUM format: timestamp tx ty tz qx qy qz qw)
     try:
         traj_data = pd.read_csv(
             traj_file,
-            sep="\s+",
+            sep=r"\s+",
             comment="#",
             header=None,
             names=["timestamp", "tx", "ty", "tz", "qx", "qy", "qz", "qw"],
@@ -63,6 +124,23 @@ def generate_visual_proof(traj_file, image_dir, output_file):
     img = Image.open(target_image_path)
     ax1.imshow(img, cmap="gray")
     ax1.set_title(f"Camera Input (Frame: {target_ts_str})", fontsize=14)
+
+    # Overlay the next seconds of the estimated (and GT) trajectory
+    if calib_file is not None:
+        camera = load_calibration(calib_file)[0]
+        overlays = project_overlays(
+            camera, np.array([target_ts / 1e9]), traj_file, gt_file
+        )
+        labels = {"est": "Estimated (next 3 s)", "gt": "Ground Truth (next 3 s)"}
+        for name, (uv, valid) in overlays.items():
+            ax1.plot(
+                uv[0, valid[0], 0],
+                uv[0, valid[0], 1],
+                color=np.array(OVERLAY_COLORS[name]) / 255.0,
+                linewidth=2,
+                label=labels[name],
+            )
+        ax1.legend(loc="lower right")
     ax1.axis("off")
 
     # Overlay status text
@@ -120,8 +198,41 @@ def generate_visual_proof(traj_file, image_dir, output_file):
 if __name__ == "__main__":
     # Define paths
     workspace_root = "/home/bigalex95/Projects/challenges/VIO-SLAM-Assignment"
-    traj_path = os.path.join(workspace_root, "results/trajectories/traj_mh_01_easy.csv")
-    img_dir = os.path.join(workspace_root, "data/MH_01_easy/mav0/cam0/data")
-    output_path = os.path.join(workspace_root, "results/visual_proof.png")
 
-    generate_visual_proof(traj_path, img_dir, output_path)
+    parser = argparse.ArgumentParser(description="Generate VIO visual proof")
+    parser.add_argument(
+        "--traj",
+        default=os.path.join(workspace_root, "results/trajectories/traj_mh_01_easy.csv"),
+    )
+    parser.add_argument(
+        "--image-dir",
+        default=os.path.join(workspace_root, "data/MH_01_easy/mav0/cam0/data"),
+    )
+    parser.add_argument(
+        "--gt",
+        default=os.path.join(
+            workspace_root,
+            "data/MH_01_easy/mav0/state_groundtruth_estimate0/data.csv",
+        ),
+    )
+    parser.add_argument(
+        "--calib", default=os.path.join(workspace_root, "configs/my_euroc_calib.json")
+    )
+    parser.add_argument(
+        "--output", default=os.path.join(workspace_root, "results/visual_proof.png")
+    )
+    parser.add_argument(
+        "--overlay-dir",
+        default=None,
+        help="Also render every cam0 frame with trajectory overlay into this directory",
+    )
+    args = parser.parse_args()
+
+    gt_path = args.gt if os.path.exists(args.gt) else None
+
+    generate_visual_proof(args.traj, args.image_dir, args.output, args.calib, gt_path)
+
+    if args.overlay_dir:
+        render_overlay_frames(
+            args.traj, args.image_dir, args.overlay_dir, args.calib, gt_path
+        )
@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""
+Rate-controlled EuRoC replay for realtime latency benchmarking.
+
+Merges the cam0 / cam1 / imu0 streams of a mav0 dataset by timestamp,
+publishes them to a local sink at 1x (or N x) realtime, and measures the
+end-to-end latency from publishing a cam0 frame to the system outputting
+the pose for that frame.
+
+The sinks are stand-ins for a live sensor driver: basalt_vio does not
+consume any of them (it reads the dataset from disk by itself), so
+latency can only be measured against a system or wrapper that reads one
+of these sinks.
+
+Sinks:
+  directory:<path>     write images / IMU lines into a directory
+  pipe:<path>          framed records into a FIFO or file ('-' for stdout;
+                       all status output then goes to stderr)
+  socket:<host>:<port> framed records over TCP
+
+Framed record: "<sensor> <timestamp_ns> <payload_len>\\n" followed by the
+payload (raw PNG bytes for cameras, "wx wy wz ax ay az\\n" for the IMU).
+
+Poses are read by tailing --pose-file, a TUM trajectory
+(timestamp[s] tx ty tz qx qy qz qw) that the consumer must append to and
+flush once per processed frame. Basalt's --save-trajectory file is written
+in one go after the run ends, so it cannot be used here.
+
+Usage:
+  python3 scripts/replay_euroc.py --dataset-path /workspace/data/MH_01_easy \\
+      --sink socket:127.0.0.1:9000 --pose-file /tmp/live_traj.txt --speed 1.0
+"""
+
+import argparse
+import heapq
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SENSORS = ['cam0', 'cam1', 'imu0']
+
+# Max distance between a pose timestamp and a cam0 frame to count as its output
+MATCH_TOLERANCE_NS = 1_000_000
+
+
+# ----------------------------------------------------------------------
+# Event streams
+# ----------------------------------------------------------------------
+
+def camera_events(mav0_dir, sensor):
+    """Yield (timestamp_ns, sensor, image_path) for one camera, in order."""
+    cam_dir = Path(mav0_dir) / sensor
+    df = pd.read_csv(cam_dir / 'data.csv', comment='#', header=None,
+                     names=['timestamp', 'filename'], dtype={'timestamp': np.int64})
+    for t_ns, filename in zip(df['timestamp'].values, df['filename'].values):
+        yield int(t_ns), sensor, cam_dir / 'data' / filename.strip()
+
+
+def imu_events(mav0_dir, sensor='imu0'):
+    """Yield (timestamp_ns, sensor, 'wx wy wz ax ay az') for the IMU, in order."""
+    df = pd.read_csv(Path(mav0_dir) / sensor / 'data.csv', comment='#', header=None)
+    timestamps = df.iloc[:, 0].values.astype(np.int64)
+    values = df.iloc[:, 1:7].values
+    for t_ns, row in zip(timestamps, values):
+        yield int(t_ns), sensor, ' '.join(f'{v:.9g}' for v in row)
+
+
+def merged_events(mav0_dir, sensors=SENSORS):
+    """Heap-merge all sensor streams into one timestamp-ordered stream."""
+    streams = []
+    for sensor in sensors:
+        if sensor.startswith('cam'):
+            streams.append(camera_events(mav0_dir, sensor))
+        else:
+            streams.append(imu_events(mav0_dir, sensor))
+    return heapq.merge(*streams, key=lambda event: event[0])
+
+
+def read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def prefetched_events(events, executor, prefetch):
+    """
+    Yield (timestamp_ns, sensor, payload_bytes) with image reads started up to
+    `prefetch` events ahead on the thread pool, so disk I/O overlaps publishing.
+    """
+    window = deque()
+
+    def submit(event):
+        t_ns, sensor, data = event
+        if isinstance(data, Path):
+            window.append((t_ns, sensor, executor.submit(read_bytes, data)))
+        else:
+            window.append((t_ns, sensor, (data + '\n').encode()))
+
+    for event in events:
+        submit(event)
+        if len(window) > prefetch:
+            t_ns, sensor, payload = window.popleft()
+            yield t_ns, sensor, payload if isinstance(payload, bytes) else payload.result()
+
+    while window:
+        t_ns, sensor, payload = window.popleft()
+        yield t_ns, sensor, payload if isinstance(payload, bytes) else payload.result()
+
+
+# ----------------------------------------------------------------------
+# Sinks
+# ----------------------------------------------------------------------
+
+class DirectorySink:
+    """Write images as <sensor>/<timestamp>.png and IMU lines to imu0.txt."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.imu_files = {}
+
+    def publish(self, t_ns, sensor, payload):
+        if sensor.startswith('cam'):
+            out_dir = self.path / sensor
+            out_dir.mkdir(exist_ok=True)
+            # Write then rename so consumers never see partial images
+            tmp = out_dir / f'.{t_ns}.png'
+            tmp.write_bytes(payload)
+            os.replace(tmp, out_dir / f'{t_ns}.png')
+        else:
+            if sensor not in self.imu_files:
+                self.imu_files[sensor] = open(self.path / f'{sensor}.txt', 'ab')
+            f = self.imu_files[sensor]
+            f.write(f'{t_ns} '.encode() + payload)
+            f.flush()
+
+    def close(self):
+        for f in self.imu_files.values():
+            f.close()
+
+
+class StreamSink:
+    """Write framed records to a binary stream (FIFO, file, stdout or socket)."""
+
+    def __init__(self, stream, on_close=None):
+        self.stream = stream
+        self.on_close = on_close
+
+    def publish(self, t_ns, sensor, payload):
+        self.stream.write(f'{sensor} {t_ns} {len(payload)}\n'.encode() + payload)
+        self.stream.flush()
+
+    def close(self):
+        self.stream.close()
+        if self.on_close is not None:
+            self.on_close()
+
+
+def is_stdout_sink(spec):
+    kind, _, target = spec.partition(':')
+    return kind == 'pipe' and target in ('', '-')
+
+
+def claim_stdout():
+    """
+    Reserve stdout for framed records: return a binary stream on the original
+    stdout and point fd 1 at stderr, so status output (ours or a library's)
+    cannot corrupt the record stream.
+    """
+    sys.stdout.flush()
+    stream = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    return stream
+
+
+def open_sink(spec):
+    """Create a sink from 'directory:<path>', 'pipe:<path>' or 'socket:<host>:<port>'."""
+    kind, _, target = spec.partition(':')
+
+    if kind == 'directory':
+        return DirectorySink(target)
+
+    if kind == 'pipe':
+        if is_stdout_sink(spec):
+            return StreamSink(claim_stdout())
+        # Opening a FIFO for writing blocks until the consumer opens it
+        return StreamSink(open(target, 'wb'))
+
+    if kind == 'socket':
+        host, _, port = target.rpartition(':')
+        sock = socket.create_connection((host or '127.0.0.1', int(port)))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return StreamSink(sock.makefile('wb'), on_close=sock.close)
+
+    raise ValueError(f'Unknown sink: {spec}')
+
+
+# ----------------------------------------------------------------------
+# Pose output monitoring
+# ----------------------------------------------------------------------
+
+class PoseTail(threading.Thread):
+    """Tail a TUM trajectory file and record the wall time each pose appears."""
+
+    def __init__(self, pose_file, poll_interval=0.001):
+        super().__init__(daemon=True)
+        self.pose_file = Path(pose_file)
+        self.poll_interval = poll_interval
+        self.received = []  # (pose_timestamp_ns, wall_time)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        existed = self.pose_file.exists()
+        while not self.pose_file.exists():
+            if self._stop_event.wait(self.poll_interval):
+                return
+
+        with open(self.pose_file) as f:
+            # Only poses written during this replay count
+            if existed:
+                f.seek(0, os.SEEK_END)
+            partial = ''
+            while True:
+                line = f.readline()
+                if not line:
+                    if self._stop_event.wait(self.poll_interval):
+                        return
+                    continue
+
+                now = time.perf_counter()
+                line = partial + line
+                if not line.endswith('\n'):
+                    partial = line
+                    continue
+                partial = ''
+
+                if line.startswith('#') or not line.strip():
+                    continue
+                t_s = float(line.split()[0])
+                self.received.append((int(round(t_s * 1e9)), now))
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+# ----------------------------------------------------------------------
+# Replay
+# ----------------------------------------------------------------------
+
+def replay(mav0_dir, sink, speed=1.0, prefetch=64, workers=4, sensors=SENSORS):
+    """
+    Publish all events at `speed` x realtime (0 = as fast as possible).
+    Returns per-event (timestamp_ns, sensor, scheduled_wall, published_wall).
+    """
+    published = []
+    events = merged_events(mav0_dir, sensors)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        stream = prefetched_events(events, executor, prefetch)
+
+        start_wall = None
+        t0_ns = None
+
+        for t_ns, sensor, payload in stream:
+            if start_wall is None:
+                start_wall = time.perf_counter()
+                t0_ns = t_ns
+
+            if speed > 0:
+                scheduled = start_wall + (t_ns - t0_ns) / 1e9 / speed
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                scheduled = time.perf_counter()
+
+            sink.publish(t_ns, sensor, payload)
+            published.append((t_ns, sensor, scheduled, time.perf_counter()))
+
+    return published
+
+
+def compute_latency(published, received, frame_sensor='cam0'):
+    """
+    Match every published frame to the first pose with (nearly) the same
+    timestamp. Returns (frame_timestamps_ns, latency_s) with NaN for frames
+    that never produced a pose.
+    """
+    frames = [(t_ns, pub) for t_ns, sensor, _, pub in published if sensor == frame_sensor]
+    frame_ts = np.array([t for t, _ in frames], dtype=np.int64)
+    frame_pub = np.array([p for _, p in frames])
+    latency = np.full(len(frames), np.nan)
+
+    if len(frames) == 0 or not received:
+        return frame_ts, latency
+
+    pose_ts = np.array([t for t, _ in received], dtype=np.int64)
+    pose_wall = np.array([w for _, w in received])
+
+    # Nearest frame for every pose
+    idx = np.clip(np.searchsorted(frame_ts, pose_ts), 1, len(frame_ts) - 1)
+    idx -= (pose_ts - frame_ts[idx - 1]) < (frame_ts[idx] - pose_ts)
+    matched = np.abs(frame_ts[idx] - pose_ts) <= MATCH_TOLERANCE_NS
+
+    # Keep the first pose per frame (iterate in reverse so earlier wins)
+    for i, wall in zip(idx[matched][::-1], pose_wall[matched][::-1]):
+        latency[i] = wall - frame_pub[i]
+
+    return frame_ts, latency
+
+
+def summarize(published, frame_ts, latency, speed):
+    """Latency / realtime statistics as a JSON-serializable dict."""
+    lag = np.array([pub - sched for _, _, sched, pub in published])
+    valid = latency[np.isfinite(latency)]
+
+    frame_times = frame_ts / 1e9
+    frame_period = float(np.median(np.diff(frame_times))) if len(frame_times) > 1 else float('nan')
+
+    summary = {
+        'speed': speed,
+        'num_events': len(published),
+        'num_frames': int(len(frame_ts)),
+        'num_poses_matched': int(len(valid)),
+        'publish_lag': {
+            'mean': float(np.mean(lag)) if len(lag) else float('nan'),
+            'p99': float(np.percentile(lag, 99)) if len(lag) else float('nan'),
+            'max': float(np.max(lag)) if len(lag) else float('nan')
+        }
+    }
+
+    if len(valid):
+        summary['latency'] = {
+            'mean': float(np.mean(valid)),
+            'median': float(np.median(valid)),
+            'p95': float(np.percentile(valid, 95)),
+            'p99': float(np.percentile(valid, 99)),
+            'max': float(np.max(valid)),
+            'min': float(np.min(valid))
+        }
+
+    # Latency growth over the run: a consumer falling steadily behind has a
+    # rising trend even while its median still looks fine
+    finite = np.isfinite(latency)
+    if np.count_nonzero(finite) > 1:
+        slope = np.polyfit(frame_times[finite], latency[finite], 1)[0]
+        span = frame_times[finite][-1] - frame_times[finite][0]
+        summary['latency']['growth'] = float(slope * span)
+
+    # Keeping up only has a meaning at a fixed replay rate: poses arrive for
+    # (almost) every frame, p95 latency stays within one wall-clock frame
+    # period and latency does not grow by more than a period over the run
+    summary['keeps_up'] = None
+    if speed > 0 and 'growth' in summary.get('latency', {}):
+        wall_period = frame_period / speed
+        summary['keeps_up'] = bool(
+            len(valid) >= 0.99 * len(frame_ts)
+            and summary['latency']['p95'] < wall_period
+            and summary['latency']['growth'] < wall_period
+        )
+
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rate-controlled EuRoC replay with latency measurement')
+    parser.add_argument('--dataset-path', required=True,
+                        help='EuRoC sequence directory (containing mav0/)')
+    parser.add_argument('--sink', default='directory:/tmp/euroc_replay',
+                        help='directory:<path> | pipe:<path> | socket:<host>:<port>')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='Replay speed as a multiple of realtime (0 = unthrottled)')
+    parser.add_argument('--sensors', nargs='+', choices=SENSORS, default=SENSORS)
+    parser.add_argument('--prefetch', type=int, default=64,
+                        help='Events read ahead of the publish position')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Image prefetch threads')
+    parser.add_argument('--pose-file', default=None,
+                        help='TUM trajectory the consumer appends one pose to per frame (enables latency)')
+    parser.add_argument('--drain', type=float, default=2.0,
+                        help='Seconds to wait for trailing poses after the last event')
+    parser.add_argument('--output-dir', default='/workspace/results/latency',
+                        help='Output directory for latency results')
+
+    args = parser.parse_args()
+
+    # Records on stdout: claim it before printing anything
+    sink = open_sink(args.sink) if is_stdout_sink(args.sink) else None
+
+    mav0_dir = Path(args.dataset_path) / 'mav0'
+    if not mav0_dir.is_dir():
+        print(f"ERROR: Dataset not found at {args.dataset_path}")
+        sys.exit(1)
+
+    sequence = Path(args.dataset_path).name.lower()
+
+    pose_tail = None
+    if args.pose_file:
+        pose_tail = PoseTail(args.pose_file)
+        pose_tail.start()
+
+    print(f"Replaying {mav0_dir} at {args.speed}x to {args.sink}")
+
+    if sink is None:
+        sink = open_sink(args.sink)
+    try:
+        published = replay(mav0_dir, sink, args.speed, args.prefetch, args.workers,
+                           args.sensors)
+    finally:
+        sink.close()
+
+    print(f"  Published {len(published)} events")
+
+    received = []
+    if pose_tail is not None:
+        time.sleep(args.drain)
+        pose_tail.stop()
+        received = pose_tail.received
+        print(f"  Received {len(received)} poses")
+
+    frame_ts, latency = compute_latency(published, received)
+    summary = summarize(published, frame_ts, latency, args.speed)
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    latency_file = output_dir / f'latency_{sequence}.csv'
+    pd.DataFrame({
+        'timestamp_ns': frame_ts,
+        'latency_s': latency
+    }).to_csv(latency_file, index=False)
+
+    summary_file = output_dir / f'latency_{sequence}.json'
+    with open(summary_file, 'w') as f:
+        json.dump(summary, f, indent=2)
+
+    print(f"\n{'='*80}")
+    print(f"REPLAY SUMMARY: {sequence} @ {args.speed}x")
+    print(f"{'='*80}")
+    print(f"  Publish lag (mean / p99 / max): {summary['publish_lag']['mean'] * 1e3:.2f} / "
+          f"{summary['publish_lag']['p99'] * 1e3:.2f} / {summary['publish_lag']['max'] * 1e3:.2f} ms")
+    if 'latency' in summary:
+        lat = summary['latency']
+        print(f"  Frames with pose: {summary['num_poses_matched']} / {summary['num_frames']}")
+        print(f"  Latency median:   {lat['median'] * 1e3:.2f} ms")
+        print(f"  Latency p95:      {lat['p95'] * 1e3:.2f} ms")
+        print(f"  Latency p99:      {lat['p99'] * 1e3:.2f} ms")
+        if 'growth' in lat:
+            print(f"  Latency growth:   {lat['growth'] * 1e3:.2f} ms over the run")
+        if summary['keeps_up'] is None:
+            print(f"  Keeps up:         n/a (unthrottled replay)")
+        else:
+            print(f"  Keeps up:         {'YES' if summary['keeps_up'] else 'NO'}")
+    print(f"\n  Per-frame latency: {latency_file}")
+    print(f"  Summary:           {summary_file}")
+
+
+if __name__ == '__main__':
+    main()